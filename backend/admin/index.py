@@ -5,12 +5,58 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with admin operation results
 """
 
+import base64
+import gzip
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = 1024
+
+def accepted_encoding(event: Dict[str, Any]) -> Optional[str]:
+    """Pick br or gzip from the Accept-Encoding header, honouring q-values"""
+    headers = event.get('headers') or {}
+    accept = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    weights = {}
+    for part in accept.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    
+    candidates = ['br', 'gzip'] if brotli else ['gzip']
+    best = max(candidates, key=lambda name: weights.get(name, weights.get('*', 0.0)))
+    return best if weights.get(best, weights.get('*', 0.0)) > 0 else None
+
+def compress_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    """Compress a JSON response body for clients that accept it; small bodies are sent as is"""
+    response['headers']['Vary'] = 'Accept-Encoding'
+    raw = response['body'].encode('utf-8')
+    encoding = accepted_encoding(event)
+    if len(raw) < COMPRESSION_MIN_BYTES or not encoding:
+        return response
+    
+    if encoding == 'br':
+        compressed = brotli.compress(raw, quality=5)
+    else:
+        compressed = gzip.compress(raw, compresslevel=6)
+    
+    response['headers']['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -69,12 +115,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 """)
                 users = cursor.fetchall()
                 
-                return {
+                return compress_response(event, {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                     'body': json.dumps([dict(user) for user in users], default=str),
                     'isBase64Encoded': False
-                }
+                })
             
             # Get admin action logs
             elif action == 'logs':
@@ -87,12 +133,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 """)
                 logs = cursor.fetchall()
                 
-                return {
+                return compress_response(event, {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                     'body': json.dumps([dict(log) for log in logs], default=str),
                     'isBase64Encoded': False
-                }
+                })
             
             # Search user by ID
             elif action == 'search':
@@ -222,6 +268,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 cursor.execute("DELETE FROM friend_requests WHERE sender_id = %s OR receiver_id = %s", (target_user_id, target_user_id))
                 cursor.execute("DELETE FROM friends WHERE user_id = %s OR friend_id = %s", (target_user_id, target_user_id))
                 cursor.execute("DELETE FROM typing_status WHERE user_id = %s OR chat_with_id = %s", (target_user_id, target_user_id))
+                cursor.execute("DELETE FROM conversation_members WHERE user_id = %s", (target_user_id,))
+                cursor.execute("DELETE FROM conversation_typing WHERE user_id = %s", (target_user_id,))
                 cursor.execute("DELETE FROM users WHERE user_id = %s", (target_user_id,))
                 
                 cursor.execute("SELECT username FROM users WHERE user_id = %s", (admin_user_id,))
@@ -250,16 +298,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                # Get all users except bots
-                cursor.execute("SELECT user_id FROM users WHERE user_id != 'BOTDGO'")
-                users = cursor.fetchall()
-                
-                # Send message from TeleDigo bot to all users
-                for user in users:
-                    cursor.execute(
-                        "INSERT INTO messages (sender_id, receiver_id, message) VALUES (%s, %s, %s)",
-                        ('BOTDGO', user['user_id'], f'📢 Уведомление от администрации:\n\n{message}')
-                    )
+                # One message in the TeleDigo announcements channel reaches every member
+                cursor.execute("SELECT id FROM conversations WHERE slug = 'announcements'")
+                channel = cursor.fetchone()
+                cursor.execute(
+                    "INSERT INTO messages (sender_id, conversation_id, message) VALUES (%s, %s, %s)",
+                    ('BOTDGO', channel['id'], f'📢 Уведомление от администрации:\n\n{message}')
+                )
+                cursor.execute(
+                    "SELECT COUNT(*) as recipients FROM conversation_members WHERE conversation_id = %s AND user_id != 'BOTDGO'",
+                    (channel['id'],)
+                )
+                recipients = cursor.fetchone()['recipients']
                 
                 cursor.execute("SELECT username FROM users WHERE user_id = %s", (admin_user_id,))
                 admin = cursor.fetchone()
@@ -272,7 +322,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 return {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'status': 'sent', 'recipients': len(users)}),
+                    'body': json.dumps({'status': 'sent', 'recipients': recipients}),
                     'isBase64Encoded': False
                 }
         
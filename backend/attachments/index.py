@@ -0,0 +1,388 @@
+"""
+Business: Chunked resumable uploads, content-addressed storage and thumbnails for message attachments
+Args: event - dict with httpMethod, body, queryStringParameters
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with upload state, attachment metadata or file content
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import secrets
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, List, Tuple
+from urllib.parse import quote
+import boto3
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from PIL import Image, UnidentifiedImageError
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+THUMBNAIL_SIZES = [128, 256, 512]
+# Uploader-declared types served inline; anything else (html, svg, ...) is forced to download
+INLINE_CONTENT_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+# Pillow refuses images over twice this many pixels (its default is ~89M) to bound thumbnail memory
+Image.MAX_IMAGE_PIXELS = 32_000_000
+
+class LocalBlobStore:
+    """Blob store on the local filesystem, used for development and tests"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.root / key, 'rb')
+
+    def put(self, key: str, stream: BinaryIO) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.part')
+        with open(tmp_path, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+        os.replace(tmp_path, path)
+
+    def delete_prefix(self, prefix: str) -> None:
+        shutil.rmtree(self.root / prefix, ignore_errors=True)
+
+    def list(self, prefix: str) -> List[str]:
+        path = self.root / prefix
+        if not path.exists():
+            return []
+        return sorted(f"{prefix}/{name}" for name in os.listdir(path) if not name.endswith('.part'))
+
+    def download_url(self, key: str, content_type: str, disposition: str):
+        return None
+
+class S3BlobStore:
+    """Blob store in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+        self.client = boto3.client(
+            's3',
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL'),
+            aws_access_key_id=os.environ.get('S3_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.environ.get('S3_SECRET_ACCESS_KEY')
+        )
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def put(self, key: str, stream: BinaryIO) -> None:
+        self.client.upload_fileobj(stream, self.bucket, key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in self.list(prefix):
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, prefix: str) -> List[str]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        keys = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix + '/'):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return sorted(keys)
+
+    def download_url(self, key: str, content_type: str, disposition: str):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': key,
+                'ResponseContentType': content_type,
+                'ResponseContentDisposition': disposition
+            },
+            ExpiresIn=3600
+        )
+
+def get_blob_store():
+    """Pick the blob store from BLOB_STORE: 's3', or 'local' for development only
+
+    There is no default: chunks of one upload may land on different function
+    instances, so a per-instance filesystem silently loses them in production.
+    Only actions that read or write file content call it, so metadata actions
+    keep working without a configured store.
+    """
+    store = os.environ.get('BLOB_STORE')
+    if store == 's3':
+        return S3BlobStore(os.environ['S3_BUCKET'])
+    if store == 'local':
+        return LocalBlobStore(os.environ.get('BLOB_STORE_PATH', '/tmp/digo-blobs'))
+    raise RuntimeError("BLOB_STORE must be set to 's3' (or 'local' for development)")
+
+def blob_key(blob_hash: str) -> str:
+    return f"blobs/{blob_hash[:2]}/{blob_hash}"
+
+def json_response(status: int, payload: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(payload, default=str),
+        'isBase64Encoded': False
+    }
+
+def media_type(content_type: str) -> str:
+    return (content_type or '').split(';')[0].strip().lower()
+
+def serving_headers(content_type: str, filename: str) -> Tuple[str, str]:
+    """Content-Type and Content-Disposition for a stored file
+
+    Only allowlisted image types are rendered by the browser; everything else is
+    downloaded as opaque bytes so an uploaded page cannot run script on our origin.
+    """
+    if media_type(content_type) in INLINE_CONTENT_TYPES:
+        return media_type(content_type), 'inline'
+    return 'application/octet-stream', f"attachment; filename*=UTF-8''{quote(filename or 'attachment')}"
+
+def binary_response(store, key: str, content_type: str, disposition: str) -> Dict[str, Any]:
+    """Serve a blob: redirect to the bucket when it can sign URLs, otherwise return it base64-encoded"""
+    url = store.download_url(key, content_type, disposition)
+    if url:
+        return {
+            'statusCode': 302,
+            'headers': {'Location': url, 'X-Content-Type-Options': 'nosniff', 'Access-Control-Allow-Origin': '*'},
+            'body': '',
+            'isBase64Encoded': False
+        }
+
+    with store.open(key) as f:
+        data = f.read()
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': content_type,
+            'Content-Disposition': disposition,
+            'X-Content-Type-Options': 'nosniff',
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': base64.b64encode(data).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    # Handle CORS OPTIONS request
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+
+    db_url = os.environ.get('DATABASE_URL')
+    conn = psycopg2.connect(db_url)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    schema = 't_p99070328_digo_messenger_proje'
+
+    try:
+        if method == 'GET':
+            params = event.get('queryStringParameters', {})
+            action = params.get('action')
+
+            # Resume point of an unfinished upload
+            if action == 'upload_status':
+                cursor.execute(
+                    f"SELECT id, size, received FROM {schema}.attachment_uploads WHERE id = %s",
+                    (params.get('upload_id'),)
+                )
+                upload = cursor.fetchone()
+                if not upload:
+                    return json_response(404, {'error': 'Upload not found'})
+
+                return json_response(200, {'upload_id': upload['id'], 'size': upload['size'], 'received': upload['received'], 'chunk_size': CHUNK_SIZE})
+
+            # Attachment metadata
+            elif action == 'attachment':
+                cursor.execute(
+                    f"SELECT id, owner_id, blob_hash, filename, content_type, size, created_at FROM {schema}.attachments WHERE id = %s",
+                    (params.get('id'),)
+                )
+                attachment = cursor.fetchone()
+                if not attachment:
+                    return json_response(404, {'error': 'Attachment not found'})
+
+                return json_response(200, dict(attachment))
+
+            # Original file
+            elif action == 'download':
+                cursor.execute(
+                    f"SELECT blob_hash, filename, content_type FROM {schema}.attachments WHERE id = %s",
+                    (params.get('id'),)
+                )
+                attachment = cursor.fetchone()
+                if not attachment:
+                    return json_response(404, {'error': 'Attachment not found'})
+
+                content_type, disposition = serving_headers(attachment['content_type'], attachment['filename'])
+                return binary_response(get_blob_store(), blob_key(attachment['blob_hash']), content_type, disposition)
+
+            # Image thumbnail, generated on first request and cached per blob and size
+            elif action == 'thumbnail':
+                try:
+                    size = int(params.get('size', 256))
+                except ValueError:
+                    size = None
+                if size not in THUMBNAIL_SIZES:
+                    return json_response(400, {'error': f"Size must be one of {THUMBNAIL_SIZES}"})
+
+                cursor.execute(
+                    f"SELECT blob_hash, content_type FROM {schema}.attachments WHERE id = %s",
+                    (params.get('id'),)
+                )
+                attachment = cursor.fetchone()
+                if not attachment:
+                    return json_response(404, {'error': 'Attachment not found'})
+                if media_type(attachment['content_type']) not in INLINE_CONTENT_TYPES:
+                    return json_response(415, {'error': 'Thumbnails are only available for images'})
+
+                store = get_blob_store()
+                thumb_key = f"thumbs/{attachment['blob_hash']}/{size}.jpg"
+                if not store.exists(thumb_key):
+                    with store.open(blob_key(attachment['blob_hash'])) as f:
+                        data = f.read()
+                    try:
+                        image = Image.open(io.BytesIO(data))
+                        image.thumbnail((size, size))
+                        thumb = io.BytesIO()
+                        image.convert('RGB').save(thumb, 'JPEG', quality=80)
+                    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+                        return json_response(415, {'error': 'Attachment is not a supported image'})
+                    thumb.seek(0)
+                    store.put(thumb_key, thumb)
+
+                return binary_response(store, thumb_key, 'image/jpeg', 'inline')
+
+        elif method == 'POST':
+            body_data = json.loads(event.get('body', '{}'))
+            action = body_data.get('action')
+
+            # Start a chunked upload
+            if action == 'start_upload':
+                size = int(body_data.get('size', 0))
+                if size <= 0 or size > MAX_UPLOAD_SIZE:
+                    return json_response(400, {'error': f"Size must be between 1 and {MAX_UPLOAD_SIZE} bytes"})
+
+                upload_id = secrets.token_hex(16)
+                cursor.execute(
+                    f"INSERT INTO {schema}.attachment_uploads (id, owner_id, filename, content_type, size) VALUES (%s, %s, %s, %s, %s)",
+                    (upload_id, body_data.get('owner_id'), body_data.get('filename'), body_data.get('content_type') or 'application/octet-stream', size)
+                )
+                conn.commit()
+
+                return json_response(200, {'upload_id': upload_id, 'chunk_size': CHUNK_SIZE, 'received': 0})
+
+            # Append a chunk; offset must match what the server already has so retries are safe
+            elif action == 'upload_chunk':
+                upload_id = body_data.get('upload_id')
+                offset = int(body_data.get('offset', -1))
+                data = base64.b64decode(body_data.get('data', ''))
+
+                cursor.execute(
+                    f"SELECT size, received FROM {schema}.attachment_uploads WHERE id = %s FOR UPDATE",
+                    (upload_id,)
+                )
+                upload = cursor.fetchone()
+                if not upload:
+                    return json_response(404, {'error': 'Upload not found'})
+                if offset != upload['received']:
+                    return json_response(409, {'error': 'Unexpected offset', 'received': upload['received']})
+                if not data or len(data) > CHUNK_SIZE or offset + len(data) > upload['size']:
+                    return json_response(400, {'error': 'Invalid chunk size'})
+
+                get_blob_store().put(f"uploads/{upload_id}/{offset:012d}", io.BytesIO(data))
+                cursor.execute(
+                    f"UPDATE {schema}.attachment_uploads SET received = %s WHERE id = %s",
+                    (offset + len(data), upload_id)
+                )
+                conn.commit()
+
+                return json_response(200, {'upload_id': upload_id, 'received': offset + len(data)})
+
+            # Assemble chunks into a content-addressed blob and create the attachment
+            elif action == 'complete_upload':
+                upload_id = body_data.get('upload_id')
+
+                cursor.execute(
+                    f"SELECT owner_id, filename, content_type, size, received FROM {schema}.attachment_uploads WHERE id = %s FOR UPDATE",
+                    (upload_id,)
+                )
+                upload = cursor.fetchone()
+                if not upload:
+                    return json_response(404, {'error': 'Upload not found'})
+                if upload['received'] != upload['size']:
+                    return json_response(409, {'error': 'Upload is incomplete', 'received': upload['received']})
+
+                # Stream chunks through the hash into a spooled file so memory stays bounded
+                store = get_blob_store()
+                digest = hashlib.sha256()
+                with tempfile.SpooledTemporaryFile(max_size=8 * CHUNK_SIZE) as assembled:
+                    assembled_size = 0
+                    for key in store.list(f"uploads/{upload_id}"):
+                        # Chunks are named by offset; a gap means a chunk is missing from the store
+                        if int(key.rsplit('/', 1)[1]) != assembled_size:
+                            break
+                        with store.open(key) as chunk:
+                            data = chunk.read()
+                        digest.update(data)
+                        assembled.write(data)
+                        assembled_size += len(data)
+
+                    # Rewind the resume offset to what is actually stored so the client re-sends the rest
+                    if assembled_size != upload['size']:
+                        cursor.execute(
+                            f"UPDATE {schema}.attachment_uploads SET received = %s WHERE id = %s",
+                            (assembled_size, upload_id)
+                        )
+                        conn.commit()
+                        return json_response(409, {'error': 'Stored chunks do not match upload size', 'received': assembled_size})
+
+                    blob_hash = digest.hexdigest()
+
+                    deduplicated = store.exists(blob_key(blob_hash))
+                    if not deduplicated:
+                        assembled.seek(0)
+                        store.put(blob_key(blob_hash), assembled)
+
+                cursor.execute(
+                    f"INSERT INTO {schema}.blobs (hash, size) VALUES (%s, %s) ON CONFLICT (hash) DO NOTHING",
+                    (blob_hash, upload['size'])
+                )
+                cursor.execute(
+                    f"INSERT INTO {schema}.attachments (owner_id, blob_hash, filename, content_type, size) VALUES (%s, %s, %s, %s, %s) RETURNING id",
+                    (upload['owner_id'], blob_hash, upload['filename'], upload['content_type'], upload['size'])
+                )
+                attachment = cursor.fetchone()
+                cursor.execute(f"DELETE FROM {schema}.attachment_uploads WHERE id = %s", (upload_id,))
+                conn.commit()
+                store.delete_prefix(f"uploads/{upload_id}")
+
+                return json_response(200, {'attachment_id': attachment['id'], 'hash': blob_hash, 'deduplicated': deduplicated})
+
+        return json_response(405, {'error': 'Method not allowed'})
+
+    finally:
+        cursor.close()
+        conn.close()
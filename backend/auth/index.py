@@ -96,6 +96,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     "INSERT INTO friends (user_id, friend_id) VALUES (%s, %s), (%s, %s)",
                     (user_id, 'BOTDGO', 'BOTDGO', user_id)
                 )
+                
+                # Subscribe to the TeleDigo announcements channel, with earlier announcements already read
+                cursor.execute("""
+                    INSERT INTO conversation_members (conversation_id, user_id, last_read_message_id)
+                    SELECT c.id, %s, (SELECT COALESCE(MAX(m.id), 0) FROM messages m WHERE m.conversation_id = c.id)
+                    FROM conversations c
+                    WHERE c.slug = 'announcements'
+                    ON CONFLICT DO NOTHING
+                """, (user_id,))
                 conn.commit()
                 
                 return {
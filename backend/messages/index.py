@@ -5,12 +5,192 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with messages or friend request data
 """
 
+import base64
+import gzip
 import json
+import math
 import os
-from typing import Dict, Any
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = 1024
+
+def accepted_encoding(event: Dict[str, Any]) -> Optional[str]:
+    """Pick br or gzip from the Accept-Encoding header, honouring q-values"""
+    headers = event.get('headers') or {}
+    accept = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    weights = {}
+    for part in accept.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    
+    candidates = ['br', 'gzip'] if brotli else ['gzip']
+    best = max(candidates, key=lambda name: weights.get(name, weights.get('*', 0.0)))
+    return best if weights.get(best, weights.get('*', 0.0)) > 0 else None
+
+def compress_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    """Compress a JSON response body for clients that accept it; small bodies are sent as is"""
+    response['headers']['Vary'] = 'Accept-Encoding'
+    raw = response['body'].encode('utf-8')
+    encoding = accepted_encoding(event)
+    if len(raw) < COMPRESSION_MIN_BYTES or not encoding:
+        return response
+    
+    if encoding == 'br':
+        compressed = brotli.compress(raw, quality=5)
+    else:
+        compressed = gzip.compress(raw, compresslevel=6)
+    
+    response['headers']['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
+# Token buckets per (user, action): burst capacity and refill rate in tokens per second
+RATE_LIMITS = {
+    'send': (20, 1.0),
+    'typing': (10, 2.0),
+    'friend_request': (5, 1 / 60),
+}
+# 'memory' keeps buckets in this instance; 'postgres' shares them through the rate_limits table
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+TYPING_REFRESH_SECONDS = 2.0
+MAX_TRACKED_KEYS = 10000
+EVICTION_SAMPLE = 100
+
+# Both ordered from least to most recently updated, so idle entries are evicted from the front
+_buckets: 'OrderedDict[Tuple[str, str], Tuple[float, float]]' = OrderedDict()
+_typing_writes: 'OrderedDict[Tuple[str, str], Tuple[bool, float]]' = OrderedDict()
+_limiter_stats: Dict[str, Dict[str, int]] = {}
+
+def refill_bucket(tokens: float, elapsed: float, capacity: float, rate: float) -> Tuple[float, float]:
+    """Refill a bucket and try to take one token; returns (tokens left, seconds to wait or 0)"""
+    tokens = min(capacity, tokens + elapsed * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+def bucket_fill(key: Tuple[str, str], now: float) -> float:
+    """Share of capacity a tracked bucket would hold now; 1.0 means forgetting it changes nothing"""
+    tokens, updated_at = _buckets[key]
+    capacity, rate = RATE_LIMITS[key[1]]
+    return min(1.0, (tokens + (now - updated_at) * rate) / capacity)
+
+def evict_idle_buckets(now: float) -> None:
+    """Drop buckets that have refilled to capacity; if still full, evict the fullest of the oldest entries
+    so that buckets of clients being throttled are never the ones forgotten"""
+    while _buckets and bucket_fill(next(iter(_buckets)), now) >= 1.0:
+        _buckets.popitem(last=False)
+    if len(_buckets) >= MAX_TRACKED_KEYS:
+        oldest = [key for key, _ in zip(_buckets, range(EVICTION_SAMPLE))]
+        del _buckets[max(oldest, key=lambda key: bucket_fill(key, now))]
+
+def record_limiter_event(action: str, outcome: str) -> None:
+    """Count allowed/limited/coalesced decisions; rejections are also logged for the metrics pipeline"""
+    stats = _limiter_stats.setdefault(action, {'allowed': 0, 'limited': 0, 'coalesced': 0})
+    stats[outcome] += 1
+    if outcome == 'limited':
+        print(json.dumps({'metric': 'rate_limiter', 'action': action, 'outcome': outcome}))
+
+def take_token(cursor, conn, schema: str, user_id: str, action: str) -> float:
+    """Consume one token for user and action; returns 0 if allowed, else seconds until retry"""
+    capacity, rate = RATE_LIMITS[action]
+    
+    if RATE_LIMIT_STORE == 'postgres':
+        cursor.execute(
+            f"INSERT INTO {schema}.rate_limits (user_id, action, tokens) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING",
+            (user_id, action, capacity)
+        )
+        cursor.execute(f"""
+            SELECT tokens, EXTRACT(EPOCH FROM clock_timestamp() - updated_at) as elapsed
+            FROM {schema}.rate_limits
+            WHERE user_id = %s AND action = %s
+            FOR UPDATE
+        """, (user_id, action))
+        bucket = cursor.fetchone()
+        tokens, retry_after = refill_bucket(bucket['tokens'], float(bucket['elapsed']), capacity, rate)
+        cursor.execute(
+            f"UPDATE {schema}.rate_limits SET tokens = %s, updated_at = clock_timestamp() WHERE user_id = %s AND action = %s",
+            (tokens, user_id, action)
+        )
+        conn.commit()
+    else:
+        now = time.monotonic()
+        tokens, updated_at = _buckets.pop((user_id, action), (capacity, now))
+        evict_idle_buckets(now)
+        tokens, retry_after = refill_bucket(tokens, now - updated_at, capacity, rate)
+        _buckets[(user_id, action)] = (tokens, now)
+    
+    record_limiter_event(action, 'limited' if retry_after else 'allowed')
+    return retry_after
+
+def typing_target(body_data: Dict[str, Any]) -> str:
+    """Coalescing key for a typing update: the other user or the conversation"""
+    if body_data.get('conversation_id'):
+        return f"conversation:{body_data['conversation_id']}"
+    return body_data.get('receiver_id')
+
+def typing_is_redundant(sender_id: str, target: str, is_typing: bool) -> bool:
+    """True if this instance wrote the same typing state for the pair moments ago"""
+    last = _typing_writes.get((sender_id, target))
+    return bool(last) and last[0] == is_typing and time.monotonic() - last[1] < TYPING_REFRESH_SECONDS
+
+def remember_typing(sender_id: str, target: str, is_typing: bool) -> None:
+    now = time.monotonic()
+    _typing_writes.pop((sender_id, target), None)
+    # Entries past the refresh window no longer coalesce anything; beyond that evict least recently written
+    while _typing_writes:
+        written_at = next(iter(_typing_writes.values()))[1]
+        if now - written_at < TYPING_REFRESH_SECONDS and len(_typing_writes) < MAX_TRACKED_KEYS:
+            break
+        _typing_writes.popitem(last=False)
+    _typing_writes[(sender_id, target)] = (is_typing, now)
+
+def member_role(cursor, schema: str, conversation_id: Any, user_id: str) -> Optional[str]:
+    """Role of the user in the conversation, None if not a member"""
+    cursor.execute(
+        f"SELECT role FROM {schema}.conversation_members WHERE conversation_id = %s AND user_id = %s",
+        (conversation_id, user_id)
+    )
+    member = cursor.fetchone()
+    return member['role'] if member else None
+
+def forbidden_response(error: str = 'Not a member of this conversation') -> Dict[str, Any]:
+    return {
+        'statusCode': 403,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'error': error}),
+        'isBase64Encoded': False
+    }
+
+def rate_limited_response(retry_after: float) -> Dict[str, Any]:
+    seconds = max(1, math.ceil(retry_after))
+    return {
+        'statusCode': 429,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'Retry-After',
+            'Retry-After': str(seconds)
+        },
+        'body': json.dumps({'error': 'Too many requests', 'retry_after': seconds}),
+        'isBase64Encoded': False
+    }
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -42,73 +222,94 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             # Get user's chats
             if action == 'chats':
+                # Each branch is an index-only lookup; partners are resolved
+                # before joining users instead of joining on a CASE expression
                 cursor.execute(f"""
-                    SELECT DISTINCT 
-                        CASE 
-                            WHEN sender_id = %s THEN receiver_id 
-                            ELSE sender_id 
-                        END as chat_user_id,
+                    SELECT
+                        u.user_id as chat_user_id,
                         u.username,
                         u.avatar_url
-                    FROM {schema}.messages m
-                    JOIN {schema}.users u ON (
-                        CASE 
-                            WHEN m.sender_id = %s THEN m.receiver_id 
-                            ELSE m.sender_id 
-                        END = u.user_id
+                    FROM {schema}.users u
+                    WHERE u.user_id IN (
+                        SELECT receiver_id FROM {schema}.messages WHERE sender_id = %s
+                        UNION
+                        SELECT sender_id FROM {schema}.messages WHERE receiver_id = %s
+                        UNION
+                        SELECT friend_id FROM {schema}.friends WHERE user_id = %s
+                        UNION
+                        SELECT user_id FROM {schema}.friends WHERE friend_id = %s
                     )
-                    WHERE sender_id = %s OR receiver_id = %s
-                    
-                    UNION
-                    
-                    SELECT DISTINCT 
-                        f.friend_id as chat_user_id,
-                        u.username,
-                        u.avatar_url
-                    FROM {schema}.friends f
-                    JOIN {schema}.users u ON f.friend_id = u.user_id
-                    WHERE f.user_id = %s
-                    
-                    UNION
-                    
-                    SELECT DISTINCT 
-                        f.user_id as chat_user_id,
-                        u.username,
-                        u.avatar_url
-                    FROM {schema}.friends f
-                    JOIN {schema}.users u ON f.user_id = u.user_id
-                    WHERE f.friend_id = %s
-                    
                     ORDER BY chat_user_id
-                """, (user_id, user_id, user_id, user_id, user_id, user_id))
-                chats = cursor.fetchall()
+                """, (user_id, user_id, user_id, user_id))
+                chats = [dict(chat) for chat in cursor.fetchall()]
                 
-                return {
+                # Groups and channels, with unread counts from the member's read cursor
+                cursor.execute(f"""
+                    SELECT
+                        NULL as chat_user_id,
+                        c.title as username,
+                        NULL as avatar_url,
+                        c.id as conversation_id,
+                        c.kind,
+                        cm.role,
+                        (
+                            SELECT COUNT(*) FROM {schema}.messages m
+                            WHERE m.conversation_id = c.id AND m.id > cm.last_read_message_id
+                        ) as unread_count
+                    FROM {schema}.conversation_members cm
+                    JOIN {schema}.conversations c ON c.id = cm.conversation_id
+                    WHERE cm.user_id = %s
+                    ORDER BY c.id
+                """, (user_id,))
+                chats.extend(dict(conversation) for conversation in cursor.fetchall())
+                
+                return compress_response(event, {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps([dict(chat) for chat in chats]),
+                    'body': json.dumps(chats),
                     'isBase64Encoded': False
-                }
+                })
             
             # Get messages with specific user
             elif action == 'messages':
                 other_user_id = params.get('other_user_id')
-                cursor.execute(f"""
-                    SELECT m.*, u.username as sender_name
-                    FROM {schema}.messages m
-                    JOIN {schema}.users u ON m.sender_id = u.user_id
-                    WHERE (sender_id = %s AND receiver_id = %s) 
-                       OR (sender_id = %s AND receiver_id = %s)
-                    ORDER BY created_at ASC
-                """, (user_id, other_user_id, other_user_id, user_id))
+                conversation_id = params.get('conversation_id')
+                
+                if conversation_id:
+                    if not member_role(cursor, schema, conversation_id, user_id):
+                        return forbidden_response()
+                    
+                    cursor.execute(f"""
+                        SELECT m.*, u.username as sender_name
+                        FROM {schema}.messages m
+                        JOIN {schema}.users u ON m.sender_id = u.user_id
+                        WHERE m.conversation_id = %s
+                        ORDER BY m.id ASC
+                    """, (conversation_id,))
+                else:
+                    cursor.execute(f"""
+                        SELECT m.*, u.username as sender_name
+                        FROM {schema}.messages m
+                        JOIN {schema}.users u ON m.sender_id = u.user_id
+                        WHERE (sender_id = %s AND receiver_id = %s) 
+                           OR (sender_id = %s AND receiver_id = %s)
+                        ORDER BY created_at ASC
+                    """, (user_id, other_user_id, other_user_id, user_id))
                 messages = cursor.fetchall()
                 
-                return {
+                # Compact shape: column names once, then one array per message
+                if params.get('format') == 'columns':
+                    columns = list(messages[0].keys()) if messages else []
+                    payload = {'columns': columns, 'rows': [[msg[col] for col in columns] for msg in messages]}
+                else:
+                    payload = [dict(msg) for msg in messages]
+                
+                return compress_response(event, {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps([dict(msg) for msg in messages], default=str),
+                    'body': json.dumps(payload, default=str),
                     'isBase64Encoded': False
-                }
+                })
             
             # Get friend requests
             elif action == 'requests':
@@ -146,9 +347,45 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
+            # Rate limiter decisions seen by this instance
+            elif action == 'rate_limit_metrics':
+                metrics = {}
+                for limited_action, stats in _limiter_stats.items():
+                    total = stats['allowed'] + stats['limited']
+                    metrics[limited_action] = dict(stats, hit_rate=stats['limited'] / total if total else 0.0)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'store': RATE_LIMIT_STORE, 'actions': metrics}),
+                    'isBase64Encoded': False
+                }
+            
             # Get typing status
             elif action == 'typing_status':
                 other_user_id = params.get('other_user_id')
+                conversation_id = params.get('conversation_id')
+                
+                if conversation_id:
+                    if not member_role(cursor, schema, conversation_id, user_id):
+                        return forbidden_response()
+                    
+                    cursor.execute(f"""
+                        SELECT u.username
+                        FROM {schema}.conversation_typing t
+                        JOIN {schema}.users u ON t.user_id = u.user_id
+                        WHERE t.conversation_id = %s AND t.user_id != %s AND t.is_typing
+                        AND t.last_updated > NOW() - INTERVAL '5 seconds'
+                    """, (conversation_id, user_id))
+                    typing_users = [row['username'] for row in cursor.fetchall()]
+                    
+                    return {
+                        'statusCode': 200,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'is_typing': bool(typing_users), 'users': typing_users}),
+                        'isBase64Encoded': False
+                    }
+                
                 cursor.execute(f"""
                     SELECT is_typing, last_updated 
                     FROM {schema}.typing_status 
@@ -167,16 +404,95 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
             action = body_data.get('action')
+
+            # Rate-limited actions are keyed by sender, reject anonymous calls before spending a token
+            if action in RATE_LIMITS and not body_data.get('sender_id'):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'sender_id is required'}),
+                    'isBase64Encoded': False
+                }
+
+            # Repeated typing updates are answered without touching the database
+            if action == 'typing' and typing_is_redundant(body_data.get('sender_id'), typing_target(body_data), body_data.get('is_typing', False)):
+                record_limiter_event('typing', 'coalesced')
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'status': 'coalesced'}),
+                    'isBase64Encoded': False
+                }
+            
+            if action in RATE_LIMITS:
+                retry_after = take_token(cursor, conn, schema, body_data.get('sender_id'), action)
+                if retry_after:
+                    return rate_limited_response(retry_after)
             
             # Send message
             if action == 'send':
                 sender_id = body_data.get('sender_id')
                 receiver_id = body_data.get('receiver_id')
-                message = body_data.get('message')
+                conversation_id = body_data.get('conversation_id')
+                attachment_id = body_data.get('attachment_id')
+                # Files travel as attachment references, the text may be empty
+                message = body_data.get('message') or ('' if attachment_id else None)
+                
+                # An attachment can be sent by its uploader or forwarded from a message the sender can read
+                if attachment_id:
+                    cursor.execute(
+                        f"""
+                        SELECT a.id FROM {schema}.attachments a
+                        WHERE a.id = %s AND (a.owner_id = %s OR EXISTS (
+                            SELECT 1 FROM {schema}.messages m
+                            LEFT JOIN {schema}.conversation_members cm
+                                ON cm.conversation_id = m.conversation_id AND cm.user_id = %s
+                            WHERE m.attachment_id = a.id
+                            AND (m.sender_id = %s OR m.receiver_id = %s OR cm.user_id IS NOT NULL)
+                        ))
+                        """,
+                        (attachment_id, sender_id, sender_id, sender_id, sender_id)
+                    )
+                    attachment = cursor.fetchone()
+                    if not attachment:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'Attachment not found'}),
+                            'isBase64Encoded': False
+                        }
+                
+                # One row per conversation message regardless of member count
+                if conversation_id:
+                    role = member_role(cursor, schema, conversation_id, sender_id)
+                    cursor.execute(f"SELECT kind FROM {schema}.conversations WHERE id = %s", (conversation_id,))
+                    conversation = cursor.fetchone()
+                    if not role or not conversation:
+                        return forbidden_response()
+                    if conversation['kind'] == 'channel' and role not in ('owner', 'admin'):
+                        return forbidden_response('Only channel owners and admins can post')
+                    
+                    cursor.execute(
+                        f"INSERT INTO {schema}.messages (sender_id, conversation_id, message, attachment_id) VALUES (%s, %s, %s, %s) RETURNING id, created_at",
+                        (sender_id, conversation_id, message, attachment_id)
+                    )
+                    result = cursor.fetchone()
+                    cursor.execute(
+                        f"UPDATE {schema}.conversation_members SET last_read_message_id = %s WHERE conversation_id = %s AND user_id = %s",
+                        (result['id'], conversation_id, sender_id)
+                    )
+                    conn.commit()
+                    
+                    return {
+                        'statusCode': 200,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'id': result['id'], 'created_at': str(result['created_at'])}),
+                        'isBase64Encoded': False
+                    }
                 
                 cursor.execute(
-                    f"INSERT INTO {schema}.messages (sender_id, receiver_id, message) VALUES (%s, %s, %s) RETURNING id, created_at",
-                    (sender_id, receiver_id, message)
+                    f"INSERT INTO {schema}.messages (sender_id, receiver_id, message, attachment_id) VALUES (%s, %s, %s, %s) RETURNING id, created_at",
+                    (sender_id, receiver_id, message, attachment_id)
                 )
                 result = cursor.fetchone()
                 conn.commit()
@@ -237,15 +553,28 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             elif action == 'typing':
                 sender_id = body_data.get('sender_id')
                 receiver_id = body_data.get('receiver_id')
+                conversation_id = body_data.get('conversation_id')
                 is_typing = body_data.get('is_typing', False)
                 
-                cursor.execute(f"""
-                    INSERT INTO {schema}.typing_status (user_id, chat_with_id, is_typing, last_updated)
-                    VALUES (%s, %s, %s, NOW())
-                    ON CONFLICT (user_id, chat_with_id) 
-                    DO UPDATE SET is_typing = %s, last_updated = NOW()
-                """, (sender_id, receiver_id, is_typing, is_typing))
+                if conversation_id:
+                    if not member_role(cursor, schema, conversation_id, sender_id):
+                        return forbidden_response()
+                    
+                    cursor.execute(f"""
+                        INSERT INTO {schema}.conversation_typing (conversation_id, user_id, is_typing, last_updated)
+                        VALUES (%s, %s, %s, NOW())
+                        ON CONFLICT (conversation_id, user_id) 
+                        DO UPDATE SET is_typing = %s, last_updated = NOW()
+                    """, (conversation_id, sender_id, is_typing, is_typing))
+                else:
+                    cursor.execute(f"""
+                        INSERT INTO {schema}.typing_status (user_id, chat_with_id, is_typing, last_updated)
+                        VALUES (%s, %s, %s, NOW())
+                        ON CONFLICT (user_id, chat_with_id) 
+                        DO UPDATE SET is_typing = %s, last_updated = NOW()
+                    """, (sender_id, receiver_id, is_typing, is_typing))
                 conn.commit()
+                remember_typing(sender_id, typing_target(body_data), is_typing)
                 
                 return {
                     'statusCode': 200,
@@ -254,6 +583,91 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
+            # Create a group or channel; the creator becomes its owner
+            elif action == 'create_conversation':
+                owner_id = body_data.get('owner_id')
+                title = body_data.get('title')
+                kind = body_data.get('kind', 'group')
+                member_ids = [member_id for member_id in body_data.get('member_ids', []) if member_id != owner_id]
+                
+                if not title or kind not in ('group', 'channel'):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Title and kind (group or channel) required'}),
+                        'isBase64Encoded': False
+                    }
+                
+                cursor.execute(
+                    f"INSERT INTO {schema}.conversations (title, kind, owner_id) VALUES (%s, %s, %s) RETURNING id",
+                    (title, kind, owner_id)
+                )
+                conversation = cursor.fetchone()
+                cursor.execute(
+                    f"INSERT INTO {schema}.conversation_members (conversation_id, user_id, role) VALUES (%s, %s, 'owner')",
+                    (conversation['id'], owner_id)
+                )
+                if member_ids:
+                    cursor.execute(f"""
+                        INSERT INTO {schema}.conversation_members (conversation_id, user_id)
+                        SELECT %s::int, user_id FROM {schema}.users WHERE user_id = ANY(%s)
+                        ON CONFLICT DO NOTHING
+                    """, (conversation['id'], member_ids))
+                conn.commit()
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'conversation_id': conversation['id'], 'status': 'created'}),
+                    'isBase64Encoded': False
+                }
+            
+            # Add members to a conversation (owner or admin only)
+            elif action == 'add_members':
+                user_id = body_data.get('user_id')
+                conversation_id = body_data.get('conversation_id')
+                
+                role = member_role(cursor, schema, conversation_id, user_id)
+                if not role:
+                    return forbidden_response()
+                if role not in ('owner', 'admin'):
+                    return forbidden_response('Only owners and admins can add members')
+                
+                # New members start reading from now, not from the whole history
+                cursor.execute(f"""
+                    INSERT INTO {schema}.conversation_members (conversation_id, user_id, last_read_message_id)
+                    SELECT %s::int, user_id, (
+                        SELECT COALESCE(MAX(id), 0) FROM {schema}.messages WHERE conversation_id = %s::int
+                    )
+                    FROM {schema}.users WHERE user_id = ANY(%s)
+                    ON CONFLICT DO NOTHING
+                """, (conversation_id, conversation_id, body_data.get('member_ids', [])))
+                added = cursor.rowcount
+                conn.commit()
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'added': added}),
+                    'isBase64Encoded': False
+                }
+            
+            # Move the member's read cursor forward
+            elif action == 'read':
+                cursor.execute(f"""
+                    UPDATE {schema}.conversation_members
+                    SET last_read_message_id = GREATEST(last_read_message_id, %s)
+                    WHERE conversation_id = %s AND user_id = %s
+                """, (body_data.get('message_id'), body_data.get('conversation_id'), body_data.get('user_id')))
+                conn.commit()
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'status': 'read'}),
+                    'isBase64Encoded': False
+                }
+            
             # Accept friend request
             elif action == 'accept_request':
                 request_id = body_data.get('request_id')
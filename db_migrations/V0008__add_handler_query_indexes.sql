@@ -0,0 +1,19 @@
+-- Composite indexes for the messages handler queries (found by scripts/check_query_plans.py)
+
+-- Conversation lookups: (sender_id = a AND receiver_id = b) OR (sender_id = b AND receiver_id = a)
+-- and the chat partner lookups in both directions
+CREATE INDEX IF NOT EXISTS idx_messages_sender_receiver ON messages(sender_id, receiver_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_messages_receiver_sender ON messages(receiver_id, sender_id, created_at);
+
+-- Single-column indexes are prefixes of the composite ones above
+DROP INDEX IF EXISTS idx_messages_sender;
+DROP INDEX IF EXISTS idx_messages_receiver;
+
+-- Duplicate pending request check in friend_request
+CREATE INDEX IF NOT EXISTS idx_friend_requests_sender_receiver_status ON friend_requests(sender_id, receiver_id, status);
+
+-- Pending requests listing ordered by newest first
+CREATE INDEX IF NOT EXISTS idx_friend_requests_pending ON friend_requests(receiver_id, created_at DESC) WHERE status = 'pending';
+
+-- Reverse friendship lookups (chats list, account deletion)
+CREATE INDEX IF NOT EXISTS idx_friends_friend ON friends(friend_id);
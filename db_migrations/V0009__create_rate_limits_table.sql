@@ -0,0 +1,9 @@
+-- Shared token buckets for per-user write rate limiting (RATE_LIMIT_STORE=postgres)
+-- Unlogged: losing buckets on a crash only resets limits, and it avoids WAL on every write
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+    user_id VARCHAR(6) NOT NULL,
+    action VARCHAR(30) NOT NULL,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, action)
+);
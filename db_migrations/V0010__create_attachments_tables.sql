@@ -0,0 +1,33 @@
+-- Content-addressed blobs: one row per distinct file content (sha256)
+CREATE TABLE IF NOT EXISTS blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Attachments reference a blob; duplicates and forwards share the same blob
+CREATE TABLE IF NOT EXISTS attachments (
+    id SERIAL PRIMARY KEY,
+    owner_id VARCHAR(6) NOT NULL,
+    blob_hash VARCHAR(64) NOT NULL,
+    filename VARCHAR(255),
+    content_type VARCHAR(100) NOT NULL,
+    size BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Chunked uploads in progress; received is the resume offset
+CREATE TABLE IF NOT EXISTS attachment_uploads (
+    id VARCHAR(32) PRIMARY KEY,
+    owner_id VARCHAR(6) NOT NULL,
+    filename VARCHAR(255),
+    content_type VARCHAR(100) NOT NULL,
+    size BIGINT NOT NULL,
+    received BIGINT DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_attachments_blob_hash ON attachments(blob_hash);
+
+-- Messages reference attachments by id instead of carrying file data
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS attachment_id INTEGER;
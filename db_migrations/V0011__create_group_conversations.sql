@@ -0,0 +1,46 @@
+-- Group conversations and broadcast channels: one message row per message, not per recipient
+CREATE TABLE IF NOT EXISTS conversations (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(100) NOT NULL,
+    kind VARCHAR(20) DEFAULT 'group',
+    owner_id VARCHAR(6) NOT NULL,
+    slug VARCHAR(50) UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Members keep a read cursor (last read message id) instead of per-recipient message copies
+CREATE TABLE IF NOT EXISTS conversation_members (
+    conversation_id INTEGER NOT NULL,
+    user_id VARCHAR(6) NOT NULL,
+    role VARCHAR(20) DEFAULT 'member',
+    last_read_message_id INTEGER DEFAULT 0,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (conversation_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_members_user ON conversation_members(user_id);
+
+-- Typing indicators inside a conversation
+CREATE TABLE IF NOT EXISTS conversation_typing (
+    conversation_id INTEGER NOT NULL,
+    user_id VARCHAR(6) NOT NULL,
+    is_typing BOOLEAN DEFAULT FALSE,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (conversation_id, user_id)
+);
+
+-- Conversation messages have no single receiver
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS conversation_id INTEGER;
+ALTER TABLE messages ALTER COLUMN receiver_id DROP NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, id) WHERE conversation_id IS NOT NULL;
+
+-- TeleDigo announcements channel replaces per-user copies of admin notifications
+INSERT INTO conversations (title, kind, owner_id, slug)
+VALUES ('TeleDigo', 'channel', 'BOTDGO', 'announcements')
+ON CONFLICT (slug) DO NOTHING;
+
+INSERT INTO conversation_members (conversation_id, user_id, role)
+SELECT c.id, u.user_id, CASE WHEN u.user_id = 'BOTDGO' THEN 'owner' ELSE 'member' END
+FROM conversations c, users u
+WHERE c.slug = 'announcements'
+ON CONFLICT DO NOTHING;
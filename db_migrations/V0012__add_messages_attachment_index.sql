@@ -0,0 +1,2 @@
+-- Forwarding check in messages send: find the messages that carry an attachment
+CREATE INDEX IF NOT EXISTS idx_messages_attachment ON messages(attachment_id) WHERE attachment_id IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Sender names for message threads (found by scripts/check_query_plans.py):
+-- every message row looks up users.username, INCLUDE makes it an index-only scan
+CREATE INDEX IF NOT EXISTS idx_users_user_id_username ON users(user_id) INCLUDE (username);
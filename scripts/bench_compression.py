@@ -0,0 +1,110 @@
+"""
+Response compression benchmark for the messages handler.
+
+Builds realistic conversation threads shaped like the `messages` action
+response, runs them through compress_response() from backend/messages/index.py
+and reports payload sizes, compression time and the estimated transfer time
+saved on slow and fast links.
+
+Usage:
+    pip install -r backend/messages/requirements.txt
+    python scripts/bench_compression.py
+"""
+
+import base64
+import datetime
+import importlib.util
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+THREAD_SIZES = [20, 200, 1000, 5000]
+LINKS_MBPS = {'3g': 1.5, '4g': 10.0}
+REPEATS = 15
+
+PHRASES = [
+    'Привет!', 'Как дела?', 'Ок', 'Договорились, созвонимся вечером',
+    'Скинь, пожалуйста, ссылку на документ, который обсуждали утром',
+    'Я уже выехал, буду минут через двадцать 🚗', 'Ахаха 😂', 'Спасибо!',
+    'Посмотри последнюю версию макета и напиши, что думаешь по поводу цветов и отступов',
+    'Завтра в 10:00 встреча в офисе, не забудь ноутбук', 'Да', 'Нет, давай позже',
+]
+
+
+def load_handler_module():
+    spec = importlib.util.spec_from_file_location('messages_index', ROOT / 'backend' / 'messages' / 'index.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_thread(size: int) -> List[Dict[str, Any]]:
+    """Rows as returned by the `messages` action for a two-person conversation"""
+    rng = random.Random(size)
+    people = [('482913', 'alexandra'), ('105377', 'mad')]
+    started = datetime.datetime(2025, 3, 1, 9, 0, 0)
+    rows = []
+    for i in range(size):
+        sender, sender_name = people[rng.random() < 0.5]
+        receiver = people[0][0] if sender == people[1][0] else people[1][0]
+        rows.append({
+            'id': 100000 + i,
+            'sender_id': sender,
+            'receiver_id': receiver,
+            'message': rng.choice(PHRASES),
+            'is_read': True,
+            'created_at': str(started + datetime.timedelta(seconds=i * rng.randint(5, 600))),
+            'sender_name': sender_name,
+        })
+    return rows
+
+
+def columns(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    names = list(rows[0].keys())
+    return {'columns': names, 'rows': [[row[name] for name in names] for row in rows]}
+
+
+def measure(module, payload: Any, encoding: str) -> Dict[str, float]:
+    """Wire size and median compression time for one payload and encoding"""
+    body = json.dumps(payload, default=str, ensure_ascii=True)
+    event = {'headers': {'Accept-Encoding': encoding}}
+    timings = []
+    for _ in range(REPEATS):
+        response = {'headers': {}, 'body': body, 'isBase64Encoded': False}
+        start = time.perf_counter()
+        module.compress_response(event, response)
+        timings.append(time.perf_counter() - start)
+
+    wire = base64.b64decode(response['body']) if response['isBase64Encoded'] else response['body'].encode('utf-8')
+    return {'bytes': len(wire), 'ms': statistics.median(timings) * 1000 if response['isBase64Encoded'] else 0.0}
+
+
+def main() -> None:
+    module = load_handler_module()
+    encodings = ['identity', 'gzip'] + (['br'] if module.brotli else [])
+    header = f"{'messages':>8} {'shape':<7} {'encoding':<8} {'bytes':>9} {'ratio':>6} {'cpu ms':>7}"
+    header += ''.join(f" {'saved ' + link:>10}" for link in LINKS_MBPS)
+    print(header)
+
+    for size in THREAD_SIZES:
+        thread = make_thread(size)
+        baseline = None
+        for shape, payload in [('rows', thread), ('columns', columns(thread))]:
+            for encoding in encodings:
+                result = measure(module, payload, encoding)
+                if baseline is None:
+                    baseline = result['bytes']
+                line = f"{size:>8} {shape:<7} {encoding:<8} {result['bytes']:>9} {baseline / result['bytes']:>5.1f}x {result['ms']:>7.2f}"
+                for mbps in LINKS_MBPS.values():
+                    saved_ms = (baseline - result['bytes']) * 8 / (mbps * 1000) - result['ms']
+                    line += f" {saved_ms:>8.1f}ms"
+                print(line)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+Query plan regression check for the backend handlers.
+
+Collects every SQL statement passed to cursor.execute() in backend/*/index.py,
+runs EXPLAIN on it against a seeded local PostgreSQL database and fails when a
+plan sequentially scans a large table or exceeds the cost budget.
+
+Usage:
+    QUERY_PLAN_DATABASE_URL=postgresql://localhost/digo_plans \\
+        python scripts/check_query_plans.py --reset
+
+Never point it at the production DATABASE_URL: --reset drops the schema.
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import psycopg2
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / 'backend'
+MIGRATIONS_DIR = ROOT / 'db_migrations'
+HANDLERS = ['auth', 'admin', 'messages', 'attachments']
+SCHEMA = 't_p99070328_digo_messenger_proje'
+
+# Statements that read whole tables by design; reported but never failed
+UNBOUNDED_STATEMENTS = {
+    'admin:users': 'lists every account',
+}
+
+SEED_SQL = """
+SELECT setseed(0.42);
+
+INSERT INTO users (user_id, username, password_hash)
+SELECT lpad(g::text, 6, '0'), 'user' || g, md5(g::text)
+FROM generate_series(2, %(users)s) g
+ON CONFLICT DO NOTHING;
+
+INSERT INTO messages (sender_id, receiver_id, message, is_read, created_at)
+SELECT
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    'seed message ' || g,
+    random() < 0.8,
+    NOW() - (random() * INTERVAL '365 days')
+FROM generate_series(1, %(users)s * 20) g;
+
+INSERT INTO friends (user_id, friend_id)
+SELECT lpad(g::text, 6, '0'), lpad((1 + (g + k) %% %(users)s)::text, 6, '0')
+FROM generate_series(1, %(users)s) g, generate_series(1, 5) k
+ON CONFLICT DO NOTHING;
+
+INSERT INTO friend_requests (sender_id, receiver_id, status, created_at)
+SELECT
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    CASE WHEN random() < 0.2 THEN 'pending' ELSE 'accepted' END,
+    NOW() - (random() * INTERVAL '365 days')
+FROM generate_series(1, %(users)s * 3) g;
+
+INSERT INTO typing_status (user_id, chat_with_id, is_typing, last_updated)
+SELECT lpad(g::text, 6, '0'), lpad((1 + g %% %(users)s)::text, 6, '0'), random() < 0.1, NOW()
+FROM generate_series(1, %(users)s) g
+ON CONFLICT DO NOTHING;
+
+INSERT INTO admin_actions (admin_id, admin_name, action_type, target_user_id, target_user_name, description, created_at)
+SELECT '000001', 'Digo', 'block', lpad(g::text, 6, '0'), 'user' || g, 'Blocked user', NOW() - (g * INTERVAL '1 minute')
+FROM generate_series(1, %(users)s / 2) g;
+
+-- Every account is subscribed to the announcements channel; one group per ten users plus a few channels
+INSERT INTO conversation_members (conversation_id, user_id, role)
+SELECT c.id, u.user_id, 'member'
+FROM conversations c, users u
+WHERE c.slug = 'announcements'
+ON CONFLICT DO NOTHING;
+
+INSERT INTO conversations (title, kind, owner_id, created_at)
+SELECT
+    'group ' || g,
+    CASE WHEN g %% 50 = 0 THEN 'channel' ELSE 'group' END,
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    NOW() - (random() * INTERVAL '365 days')
+FROM generate_series(1, %(users)s / 10) g;
+
+INSERT INTO conversation_members (conversation_id, user_id, role)
+SELECT id, owner_id, 'owner' FROM conversations WHERE slug IS NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO conversation_members (conversation_id, user_id, role)
+SELECT c.id, lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'), 'member'
+FROM conversations c, generate_series(1, 12) k
+WHERE c.slug IS NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO messages (sender_id, conversation_id, message, created_at)
+SELECT m.user_id, m.conversation_id, 'seed post ' || g, NOW() - (random() * INTERVAL '365 days')
+FROM generate_series(1, %(users)s * 5) g
+JOIN LATERAL (
+    SELECT conversation_id, user_id FROM conversation_members
+    WHERE conversation_id = (SELECT MIN(id) FROM conversations WHERE slug IS NULL) + (g %% (%(users)s / 10))
+    ORDER BY random()
+    LIMIT 1
+) m ON true;
+
+INSERT INTO messages (sender_id, conversation_id, message, created_at)
+SELECT owner_id, id, 'announcement ' || g, NOW() - (g * INTERVAL '1 hour')
+FROM conversations, generate_series(1, 200) g
+WHERE slug = 'announcements';
+
+UPDATE conversation_members cm
+SET last_read_message_id = (SELECT MAX(id) FROM messages m WHERE m.conversation_id = cm.conversation_id) - floor(random() * 20)::int;
+
+INSERT INTO conversation_typing (conversation_id, user_id, is_typing, last_updated)
+SELECT conversation_id, user_id, true, NOW()
+FROM conversation_members
+WHERE random() < 0.01
+ON CONFLICT DO NOTHING;
+
+INSERT INTO blobs (hash, size)
+SELECT md5(g::text) || md5((-g)::text), 1024 + g
+FROM generate_series(1, %(users)s * 2) g;
+
+INSERT INTO attachments (owner_id, blob_hash, filename, content_type, size, created_at)
+SELECT
+    lpad((1 + floor(random() * %(users)s))::int::text, 6, '0'),
+    md5(g::text) || md5((-g)::text),
+    'file' || g || '.jpg',
+    'image/jpeg',
+    1024 + g,
+    NOW() - (random() * INTERVAL '365 days')
+FROM generate_series(1, %(users)s * 2) g;
+
+UPDATE messages SET attachment_id = 1 + (id %% (%(users)s * 2))
+WHERE id %% 10 = 0;
+
+INSERT INTO attachment_uploads (id, owner_id, filename, content_type, size, received)
+SELECT md5('upload' || g), lpad((1 + g %% %(users)s)::text, 6, '0'), 'upload' || g || '.jpg', 'image/jpeg', 4194304, 1048576
+FROM generate_series(1, %(users)s / 10) g;
+
+INSERT INTO rate_limits (user_id, action, tokens, updated_at)
+SELECT lpad(g::text, 6, '0'), a, random() * 5, NOW() - (random() * INTERVAL '1 hour')
+FROM generate_series(1, %(users)s) g, unnest(ARRAY['send', 'typing', 'friend_request']) a;
+"""
+
+
+def _string_constants(tree: ast.AST) -> Dict[str, str]:
+    """Collect simple `name = 'literal'` assignments used inside f-string SQL"""
+    constants: Dict[str, str] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def _render_sql(node: ast.AST, constants: Dict[str, str]) -> Optional[str]:
+    """Turn the first argument of cursor.execute() back into SQL text"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name) and value.value.id in constants:
+                parts.append(constants[value.value.id])
+            else:
+                return None
+        return ''.join(parts)
+    return None
+
+
+def _action_of(node: ast.AST, parents: Dict[ast.AST, ast.AST]) -> str:
+    """Name the handler branch a statement belongs to: `action == 'x'` or the enclosing function"""
+    current = parents.get(node)
+    while current is not None:
+        if isinstance(current, ast.If):
+            test = current.test
+            if (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == 'action'
+                    and isinstance(test.comparators[0], ast.Constant)):
+                return test.comparators[0].value
+        if isinstance(current, ast.FunctionDef):
+            return current.name
+        current = parents.get(current)
+    return 'module'
+
+
+def extract_statements(function: str) -> List[Dict[str, Any]]:
+    """Find every cursor.execute() call in a handler"""
+    path = BACKEND_DIR / function / 'index.py'
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    constants = _string_constants(tree)
+    parents = {child: parent for parent in ast.walk(tree) for child in ast.iter_child_nodes(parent)}
+
+    statements = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'execute' and node.args):
+            continue
+        statements.append({
+            'label': f"{function}:{_action_of(node, parents)}",
+            'location': f"backend/{function}/index.py:{node.lineno}",
+            'sql': _render_sql(node.args[0], constants),
+        })
+    return sorted(statements, key=lambda s: int(s['location'].rsplit(':', 1)[1]))
+
+
+def to_prepared(sql: str) -> Tuple[str, int]:
+    """Replace psycopg2 %s placeholders with $n so the statement can be PREPAREd"""
+    count = 0
+
+    def number(_: re.Match) -> str:
+        nonlocal count
+        count += 1
+        return f"${count}"
+
+    return re.sub(r'%s', number, sql).replace('%%', '%'), count
+
+
+def seed(cursor, users: int, reset: bool) -> None:
+    """Create the handler schema from db_migrations and fill it with synthetic data"""
+    if reset:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", (SCHEMA,))
+    if cursor.fetchone():
+        return
+
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+
+    for migration in sorted(MIGRATIONS_DIR.glob('V*.sql')):
+        cursor.execute(migration.read_text(encoding='utf-8'))
+    cursor.execute(SEED_SQL, {'users': users})
+    # VACUUM sets the visibility map as autovacuum does in production, so index-only scans are costed
+    # realistically; it cannot run inside the multi-statement seed
+    cursor.execute("VACUUM ANALYZE")
+
+
+def table_sizes(cursor) -> Dict[str, float]:
+    """Planner row estimates for tables in the handler schema"""
+    cursor.execute("""
+        SELECT c.relname, c.reltuples
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relkind = 'r'
+    """, (SCHEMA,))
+    return {name: rows for name, rows in cursor.fetchall()}
+
+
+def explain(cursor, sql: str) -> Dict[str, Any]:
+    """Generic plan for a statement, independent of concrete parameter values"""
+    prepared, count = to_prepared(sql)
+    cursor.execute(f"PREPARE plan_check AS {prepared}")
+    try:
+        args = f"({', '.join(['NULL'] * count)})" if count else ''
+        cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE plan_check{args}")
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+    finally:
+        cursor.execute("DEALLOCATE plan_check")
+
+
+def plan_nodes(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    nodes = [plan]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def check_plan(plan: Dict[str, Any], sizes: Dict[str, float], min_rows: int, max_cost: float) -> List[str]:
+    """Problems found in a plan; empty list means it passes"""
+    problems = []
+    for node in plan_nodes(plan):
+        relation = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and sizes.get(relation, 0) >= min_rows:
+            problems.append(f"seq scan on {relation} (~{int(sizes[relation])} rows)")
+    if plan['Total Cost'] > max_cost:
+        problems.append(f"cost {plan['Total Cost']:.0f} exceeds budget {max_cost:.0f}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='EXPLAIN every handler query against a seeded database')
+    parser.add_argument('--dsn', default=os.environ.get('QUERY_PLAN_DATABASE_URL'),
+                        help='local database to seed (default: $QUERY_PLAN_DATABASE_URL)')
+    parser.add_argument('--reset', action='store_true', help='drop and re-seed the schema (seeded once otherwise)')
+    parser.add_argument('--users', type=int, default=20000, help='number of seeded users')
+    parser.add_argument('--min-rows', type=int, default=1000, help='tables at least this large must not be seq scanned')
+    parser.add_argument('--max-cost', type=float, default=500.0, help='planner cost budget per statement')
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error('set --dsn or QUERY_PLAN_DATABASE_URL')
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    failures = 0
+    try:
+        seed(cursor, args.users, args.reset)
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        cursor.execute("SET plan_cache_mode = force_generic_plan")
+        sizes = table_sizes(cursor)
+
+        for function in HANDLERS:
+            for statement in extract_statements(function):
+                label, location, sql = statement['label'], statement['location'], statement['sql']
+                if sql is None:
+                    print(f"FAIL  {label:<28} {location}  SQL is built dynamically and cannot be checked")
+                    failures += 1
+                    continue
+                try:
+                    plan = explain(cursor, sql)
+                except psycopg2.Error as e:
+                    print(f"FAIL  {label:<28} {location}  {str(e).strip()}")
+                    failures += 1
+                    continue
+
+                problems = check_plan(plan, sizes, args.min_rows, args.max_cost)
+                cost = f"cost={plan['Total Cost']:.1f}"
+                if problems and label in UNBOUNDED_STATEMENTS:
+                    print(f"SKIP  {label:<28} {location}  {cost}  ({UNBOUNDED_STATEMENTS[label]})")
+                elif problems:
+                    print(f"FAIL  {label:<28} {location}  {cost}  {'; '.join(problems)}")
+                    failures += 1
+                else:
+                    print(f"ok    {label:<28} {location}  {cost}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\n{failures} statement(s) failed" if failures else "\nall statements passed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
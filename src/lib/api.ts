@@ -15,14 +15,28 @@ export interface Message {
   sender_id: string;
   receiver_id: string;
   message: string;
+  attachment_id?: number | null;
   sender_name?: string;
   created_at: string;
 }
 
 export interface Chat {
-  chat_user_id: string;
+  chat_user_id: string | null;
   username: string;
   avatar_url?: string;
+  conversation_id?: number;
+  kind?: 'group' | 'channel';
+  role?: 'owner' | 'admin' | 'member';
+  unread_count?: number;
+}
+
+// Direct chats are addressed by the other user, groups and channels by conversation id
+function chatParams(chat: Chat): string {
+  return chat.conversation_id ? `conversation_id=${chat.conversation_id}` : `other_user_id=${chat.chat_user_id}`;
+}
+
+function chatBody(chat: Chat) {
+  return chat.conversation_id ? { conversation_id: chat.conversation_id } : { receiver_id: chat.chat_user_id };
 }
 
 export interface FriendRequest {
@@ -34,6 +48,15 @@ export interface FriendRequest {
   created_at: string;
 }
 
+interface ColumnarRows {
+  columns: string[];
+  rows: unknown[][];
+}
+
+function fromColumns<T>(data: ColumnarRows): T[] {
+  return data.rows.map(row => Object.fromEntries(data.columns.map((column, i) => [column, row[i]])) as T);
+}
+
 export const api = {
   async register(username: string, password: string): Promise<User> {
     const response = await fetch(API_URLS.auth, {
@@ -62,18 +85,22 @@ export const api = {
     return response.json();
   },
 
-  async getMessages(userId: string, otherUserId: string): Promise<Message[]> {
-    const response = await fetch(`${API_URLS.messages}?action=messages&user_id=${userId}&other_user_id=${otherUserId}`);
-    return response.json();
+  async getMessages(userId: string, chat: Chat): Promise<Message[]> {
+    const response = await fetch(`${API_URLS.messages}?action=messages&user_id=${userId}&${chatParams(chat)}&format=columns`);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Failed to load messages');
+    return fromColumns<Message>(data);
   },
 
-  async sendMessage(senderId: string, receiverId: string, message: string) {
+  async sendMessage(senderId: string, chat: Chat, message: string, attachmentId?: number) {
     const response = await fetch(API_URLS.messages, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ action: 'send', sender_id: senderId, receiver_id: receiverId, message })
+      body: JSON.stringify({ action: 'send', sender_id: senderId, ...chatBody(chat), message, attachment_id: attachmentId })
     });
-    return response.json();
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Send failed');
+    return data;
   },
 
   async getFriendRequests(userId: string): Promise<FriendRequest[]> {
@@ -183,17 +210,48 @@ export const api = {
     return response.json();
   },
 
-  async updateTypingStatus(senderId: string, receiverId: string, isTyping: boolean) {
+  async updateTypingStatus(senderId: string, chat: Chat, isTyping: boolean) {
     const response = await fetch(API_URLS.messages, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ action: 'typing', sender_id: senderId, receiver_id: receiverId, is_typing: isTyping })
+      body: JSON.stringify({ action: 'typing', sender_id: senderId, ...chatBody(chat), is_typing: isTyping })
     });
     return response.json();
   },
 
-  async getTypingStatus(userId: string, otherUserId: string) {
-    const response = await fetch(`${API_URLS.messages}?action=typing_status&user_id=${userId}&other_user_id=${otherUserId}`);
+  async getTypingStatus(userId: string, chat: Chat) {
+    const response = await fetch(`${API_URLS.messages}?action=typing_status&user_id=${userId}&${chatParams(chat)}`);
+    return response.json();
+  },
+
+  async createConversation(ownerId: string, title: string, memberIds: string[], kind: 'group' | 'channel' = 'group') {
+    const response = await fetch(API_URLS.messages, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ action: 'create_conversation', owner_id: ownerId, title, kind, member_ids: memberIds })
+    });
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Failed to create conversation');
+    return data;
+  },
+
+  async addConversationMembers(userId: string, conversationId: number, memberIds: string[]) {
+    const response = await fetch(API_URLS.messages, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ action: 'add_members', user_id: userId, conversation_id: conversationId, member_ids: memberIds })
+    });
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Failed to add members');
+    return data;
+  },
+
+  async markConversationRead(userId: string, conversationId: number, messageId: number) {
+    const response = await fetch(API_URLS.messages, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ action: 'read', user_id: userId, conversation_id: conversationId, message_id: messageId })
+    });
     return response.json();
   }
 };
\ No newline at end of file
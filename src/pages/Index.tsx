@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Card } from '@/components/ui/card';
@@ -32,6 +32,8 @@ export default function Index() {
   const [lastMessageCount, setLastMessageCount] = useState(0);
   const [isTyping, setIsTyping] = useState(false);
   const [typingTimeout, setTypingTimeout] = useState<NodeJS.Timeout | null>(null);
+  const [lastTypingSentAt, setLastTypingSentAt] = useState(0);
+  const lastReadMessageId = useRef(0);
   const { toast } = useToast();
 
   const playNotificationSound = () => {
@@ -57,9 +59,10 @@ export default function Index() {
 
   useEffect(() => {
     if (selectedChat && currentUser) {
-      loadMessages(currentUser.user_id, selectedChat.chat_user_id);
+      lastReadMessageId.current = 0;
+      loadMessages(currentUser.user_id, selectedChat);
       const interval = setInterval(() => {
-        loadMessages(currentUser.user_id, selectedChat.chat_user_id);
+        loadMessages(currentUser.user_id, selectedChat);
         checkTypingStatus();
       }, 3000);
       return () => clearInterval(interval);
@@ -68,19 +71,24 @@ export default function Index() {
 
   const checkTypingStatus = async () => {
     if (!currentUser || !selectedChat) return;
-    const data = await api.getTypingStatus(currentUser.user_id, selectedChat.chat_user_id);
+    const data = await api.getTypingStatus(currentUser.user_id, selectedChat);
     setIsTyping(data.is_typing);
   };
 
   const handleTyping = async () => {
     if (!currentUser || !selectedChat) return;
     
-    await api.updateTypingStatus(currentUser.user_id, selectedChat.chat_user_id, true);
+    // Typing status stays fresh for 5 seconds on the server, so one update per 2 seconds is enough
+    if (Date.now() - lastTypingSentAt > 2000) {
+      setLastTypingSentAt(Date.now());
+      await api.updateTypingStatus(currentUser.user_id, selectedChat, true);
+    }
     
     if (typingTimeout) clearTimeout(typingTimeout);
     
     const timeout = setTimeout(async () => {
-      await api.updateTypingStatus(currentUser.user_id, selectedChat.chat_user_id, false);
+      setLastTypingSentAt(0);
+      await api.updateTypingStatus(currentUser.user_id, selectedChat, false);
     }, 3000);
     
     setTypingTimeout(timeout);
@@ -108,8 +116,17 @@ export default function Index() {
     setChats(data);
   };
 
-  const loadMessages = async (userId: string, otherUserId: string) => {
-    const data = await api.getMessages(userId, otherUserId);
+  const loadMessages = async (userId: string, chat: Chat) => {
+    let data: Message[];
+    try {
+      data = await api.getMessages(userId, chat);
+    } catch (error: any) {
+      // Closing the chat stops the polling interval, so the error is shown once
+      toast({ title: 'Ошибка', description: error.message, variant: 'destructive' });
+      setSelectedChat(null);
+      loadChats(userId);
+      return;
+    }
     
     if (data.length > lastMessageCount && lastMessageCount > 0) {
       const latestMessage = data[data.length - 1];
@@ -124,17 +141,28 @@ export default function Index() {
       }
     }
     
+    const lastId = data.length ? data[data.length - 1].id : 0;
+    if (chat.conversation_id && lastId > lastReadMessageId.current) {
+      lastReadMessageId.current = lastId;
+      api.markConversationRead(userId, chat.conversation_id, lastId);
+    }
+    
     setLastMessageCount(data.length);
     setMessages(data);
   };
 
   const sendMessage = async () => {
     if (!newMessage.trim() || !selectedChat || !currentUser) return;
-    await api.sendMessage(currentUser.user_id, selectedChat.chat_user_id, newMessage);
-    await api.updateTypingStatus(currentUser.user_id, selectedChat.chat_user_id, false);
+    try {
+      await api.sendMessage(currentUser.user_id, selectedChat, newMessage);
+    } catch (error: any) {
+      toast({ title: 'Ошибка', description: error.message, variant: 'destructive' });
+      return;
+    }
+    await api.updateTypingStatus(currentUser.user_id, selectedChat, false);
     if (typingTimeout) clearTimeout(typingTimeout);
     setNewMessage('');
-    loadMessages(currentUser.user_id, selectedChat.chat_user_id);
+    loadMessages(currentUser.user_id, selectedChat);
   };
 
   const loadFriendRequests = async (userId: string) => {
@@ -343,7 +371,7 @@ export default function Index() {
                 <div className="divide-y">
                   {chats.map((chat) => (
                     <div
-                      key={chat.chat_user_id}
+                      key={chat.conversation_id ? `conversation-${chat.conversation_id}` : chat.chat_user_id}
                       className="flex items-center gap-3 p-3 hover:bg-secondary cursor-pointer transition"
                       onClick={() => setSelectedChat(chat)}
                     >
@@ -352,8 +380,11 @@ export default function Index() {
                       </Avatar>
                       <div className="flex-1 min-w-0">
                         <p className="font-medium truncate">{chat.username}</p>
-                        <p className="text-xs text-muted-foreground">ID: {chat.chat_user_id}</p>
+                        <p className="text-xs text-muted-foreground">
+                          {chat.conversation_id ? (chat.kind === 'channel' ? 'Канал' : 'Группа') : `ID: ${chat.chat_user_id}`}
+                        </p>
                       </div>
+                      {!!chat.unread_count && <Badge>{chat.unread_count}</Badge>}
                     </div>
                   ))}
                 </div>
@@ -571,22 +602,28 @@ export default function Index() {
                 </div>
               </ScrollArea>
 
-              <div className="border-t p-4">
-                <div className="flex gap-2">
-                  <Input
-                    placeholder="Введите сообщение..."
-                    value={newMessage}
-                    onChange={(e) => {
-                      setNewMessage(e.target.value);
-                      handleTyping();
-                    }}
-                    onKeyPress={(e) => e.key === 'Enter' && sendMessage()}
-                  />
-                  <Button onClick={sendMessage} size="icon">
-                    <Icon name="Send" size={18} />
-                  </Button>
+              {selectedChat.kind === 'channel' && selectedChat.role === 'member' ? (
+                <div className="border-t p-4 text-center text-sm text-muted-foreground">
+                  Только администраторы канала могут публиковать сообщения
                 </div>
-              </div>
+              ) : (
+                <div className="border-t p-4">
+                  <div className="flex gap-2">
+                    <Input
+                      placeholder="Введите сообщение..."
+                      value={newMessage}
+                      onChange={(e) => {
+                        setNewMessage(e.target.value);
+                        handleTyping();
+                      }}
+                      onKeyPress={(e) => e.key === 'Enter' && sendMessage()}
+                    />
+                    <Button onClick={sendMessage} size="icon">
+                      <Icon name="Send" size={18} />
+                    </Button>
+                  </div>
+                </div>
+              )}
             </>
           ) : (
             <div className="flex-1 flex items-center justify-center text-muted-foreground">